@@ -0,0 +1,200 @@
+"""Triton kernel for the :class:`snntorch.Funky` single-step update with the
+default ATan surrogate gradient baked in. Triton is an optional dependency:
+if it cannot be imported, :func:`supported` always returns False and Funky
+keeps using its scripted kernels."""
+
+import torch
+
+try:
+    import triton
+    import triton.language as tl
+except ImportError:
+    triton = None
+
+
+__all__ = [
+    "supported",
+    "funky_step_atan",
+]
+
+BLOCK_SIZE = 1024
+
+if triton is not None:
+
+    @triton.jit
+    def _funky_step_kernel(
+        mem_ptr,
+        input_ptr,
+        beta_ptr,
+        threshold_ptr,
+        spk_ptr,
+        mem_out_ptr,
+        n_elements,
+        n_neurons,
+        alpha_sub: tl.constexpr,
+        alpha_zero: tl.constexpr,
+        BETA_IS_SCALAR: tl.constexpr,
+        THRESHOLD_IS_SCALAR: tl.constexpr,
+        BLOCK_SIZE: tl.constexpr,
+    ):
+        pid = tl.program_id(axis=0)
+        offsets = pid * BLOCK_SIZE + tl.arange(0, BLOCK_SIZE)
+        mask = offsets < n_elements
+
+        mem = tl.load(mem_ptr + offsets, mask=mask).to(tl.float32)
+        input_ = tl.load(input_ptr + offsets, mask=mask).to(tl.float32)
+        if BETA_IS_SCALAR:
+            beta = tl.load(beta_ptr).to(tl.float32)
+        else:
+            beta = tl.load(beta_ptr + offsets % n_neurons, mask=mask).to(
+                tl.float32
+            )
+        if THRESHOLD_IS_SCALAR:
+            threshold = tl.load(threshold_ptr).to(tl.float32)
+        else:
+            threshold = tl.load(
+                threshold_ptr + offsets % n_neurons, mask=mask
+            ).to(tl.float32)
+
+        reset = (mem > threshold).to(tl.float32)
+        mem = (
+            beta * (mem - alpha_zero * reset * mem)
+            + input_
+            - alpha_sub * reset * threshold
+        )
+        spk = (mem > threshold).to(tl.float32)
+
+        tl.store(
+            mem_out_ptr + offsets,
+            mem.to(mem_out_ptr.dtype.element_ty),
+            mask=mask,
+        )
+        tl.store(
+            spk_ptr + offsets, spk.to(spk_ptr.dtype.element_ty), mask=mask
+        )
+
+
+def _param_supported(param, input_):
+    # either one value for the whole layer, or one per neuron along the
+    # last dimension
+    return param.numel() == 1 or (
+        param.dim() == 1 and param.size(0) == input_.size(-1)
+    )
+
+
+def supported(mem, input_, beta, threshold):
+    """Returns True if the Triton kernel can run the step for these
+    operands."""
+    return (
+        triton is not None
+        and input_.is_cuda
+        and input_.dim() > 0
+        and mem.shape == input_.shape
+        and mem.dtype == input_.dtype
+        and input_.dtype in (torch.float32, torch.float16, torch.bfloat16)
+        and beta.device == input_.device
+        and threshold.device == input_.device
+        and _param_supported(beta, input_)
+        and _param_supported(threshold, input_)
+    )
+
+
+def _sum_to(grad, param):
+    if param.numel() == 1:
+        return grad.sum().reshape(param.shape).to(param.dtype)
+    return grad.reshape(-1, param.size(0)).sum(0).to(param.dtype)
+
+
+class FunkyStepATan(torch.autograd.Function):
+    """Funky single-step update on a Triton kernel.
+
+    **Forward pass:** membrane update, reset and Heaviside spike in a
+    single kernel launch.
+
+    **Backward pass:** gradient of the update, with the ATan surrogate
+    (see :class:`snntorch.surrogate.ATan`) for the spike. The reset signal
+    is detached, as in the scripted kernels."""
+
+    @staticmethod
+    def forward(
+        ctx, mem, input_, beta, threshold, alpha_sub, alpha_zero, alpha
+    ):
+        mem = mem.contiguous()
+        input_ = input_.contiguous()
+        beta = beta.contiguous()
+        threshold = threshold.contiguous()
+
+        spk = torch.empty_like(input_)
+        mem_out = torch.empty_like(input_)
+        n_elements = input_.numel()
+        grid = (triton.cdiv(n_elements, BLOCK_SIZE),)
+        _funky_step_kernel[grid](
+            mem,
+            input_,
+            beta,
+            threshold,
+            spk,
+            mem_out,
+            n_elements,
+            input_.size(-1),
+            alpha_sub=alpha_sub,
+            alpha_zero=alpha_zero,
+            BETA_IS_SCALAR=beta.numel() == 1,
+            THRESHOLD_IS_SCALAR=threshold.numel() == 1,
+            BLOCK_SIZE=BLOCK_SIZE,
+        )
+
+        # the backward recomputes the cheap update instead of storing it
+        ctx.save_for_backward(mem, input_, beta, threshold)
+        ctx.alpha_sub = alpha_sub
+        ctx.alpha_zero = alpha_zero
+        ctx.alpha = alpha
+        return spk, mem_out
+
+    @staticmethod
+    def backward(ctx, grad_spk, grad_mem):
+        mem, input_, beta, threshold = ctx.saved_tensors
+        alpha_sub, alpha_zero = ctx.alpha_sub, ctx.alpha_zero
+        alpha = ctx.alpha
+
+        reset = (mem > threshold).to(mem.dtype)
+        mem_kept = mem - alpha_zero * reset * mem
+        mem_next = beta * mem_kept + input_ - alpha_sub * reset * threshold
+        mem_shift = mem_next - threshold
+        grad_spk = (
+            alpha / 2 / (1 + (torch.pi / 2 * alpha * mem_shift).pow_(2))
+        ) * grad_spk
+        grad_next = grad_mem + grad_spk
+
+        grad_mem_prev = grad_input = grad_beta = grad_threshold = None
+        if ctx.needs_input_grad[0]:
+            grad_mem_prev = grad_next * beta * (1 - alpha_zero * reset)
+        if ctx.needs_input_grad[1]:
+            grad_input = grad_next
+        if ctx.needs_input_grad[2]:
+            grad_beta = _sum_to(grad_next * mem_kept, beta)
+        if ctx.needs_input_grad[3]:
+            grad_threshold = _sum_to(
+                -alpha_sub * reset * grad_next - grad_spk, threshold
+            )
+
+        return (
+            grad_mem_prev,
+            grad_input,
+            grad_beta,
+            grad_threshold,
+            None,
+            None,
+            None,
+        )
+
+
+def funky_step_atan(
+    mem, input_, beta, threshold, alpha_sub, alpha_zero, alpha=2.0
+):
+    """Runs one Funky step on the Triton kernel. Returns `(spk, mem)`, with
+    `spk` carrying the ATan surrogate gradient. Check :func:`supported`
+    first."""
+    return FunkyStepATan.apply(
+        mem, input_, beta, threshold, alpha_sub, alpha_zero, alpha
+    )
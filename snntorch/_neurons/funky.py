@@ -1,6 +1,137 @@
-from .neurons import LIF
+from typing import Optional, Tuple
+from warnings import warn
+import weakref
+
+from .neurons import SpikingNeuron, LIF
+from . import _funky_kernel
 import torch
-from torch import nn
+from torch import nn, Tensor
+
+
+# The reset mechanisms differ only in which term is removed on reset, so a
+# single branchless update covers all three via the (alpha_sub, alpha_zero)
+# weights below. Each kernel runs as one scripted (or, with
+# Funky.compile_step, Inductor-compiled) graph, letting the fuser emit a
+# single elementwise kernel per step instead of launching
+# clamp/mul/add/sub/compare separately.
+_reset_alphas = {
+    0: (1.0, 0.0),  # reset by subtraction
+    1: (0.0, 1.0),  # reset to zero
+    2: (0.0, 0.0),  # no reset, pure integration
+}
+
+
+def _funky_update_reset(
+    mem: Tensor,
+    input_: Tensor,
+    beta: Tensor,
+    threshold: Tensor,
+    alpha_sub: float,
+    alpha_zero: float,
+) -> Tuple[Tensor, Tensor, Tensor]:
+    """Single time step. Returns the hard (forward-only) spike, the new
+    membrane potential and the reset signal."""
+    reset = (mem > threshold).to(mem.dtype)
+    mem = (
+        beta * (mem - alpha_zero * reset * mem)
+        + input_
+        - alpha_sub * reset * threshold
+    )
+    spk = (mem > threshold).to(mem.dtype)
+    return spk, mem, reset
+
+
+def _funky_update(
+    mem: Tensor,
+    input_: Tensor,
+    beta: Tensor,
+    threshold: Tensor,
+    alpha_sub: float,
+    alpha_zero: float,
+) -> Tuple[Tensor, Tensor]:
+    """As :func:`_funky_update_reset`, but keeps the reset signal inside
+    the kernel rather than materializing it as an extra output."""
+    spk, mem, _ = _funky_update_reset(
+        mem, input_, beta, threshold, alpha_sub, alpha_zero
+    )
+    return spk, mem
+
+
+def _funky_update_no_delay(
+    mem: Tensor,
+    input_: Tensor,
+    beta: Tensor,
+    threshold: Tensor,
+    alpha_sub: float,
+    alpha_zero: float,
+) -> Tuple[Tensor, Tensor]:
+    """As :func:`_funky_update`, for `reset_delay=False`: neurons that
+    spike are also reset within the same time step."""
+    spk, mem, reset = _funky_update_reset(
+        mem, input_, beta, threshold, alpha_sub, alpha_zero
+    )
+    do_reset = spk - reset  # avoid double reset
+    mem = mem - do_reset * (alpha_sub * threshold + alpha_zero * mem)
+    return spk, mem
+
+
+_funky_kernels = (_funky_update, _funky_update_reset, _funky_update_no_delay)
+_funky_kernels_jit = tuple(torch.jit.script(fn) for fn in _funky_kernels)
+
+
+def _inference_only(tensor):
+    """Returns True for a tensor created under :func:`torch.inference_mode`
+    that is used outside of it, where it can be neither updated in-place
+    nor saved for backward."""
+    return tensor.is_inference() and not torch.is_inference_mode_enabled()
+
+
+@torch.jit.script
+def _funky_rollout(
+    input_: Tensor,
+    mem: Tensor,
+    beta: Tensor,
+    threshold: Tensor,
+    noise: Optional[Tensor],
+    alpha_sub: float,
+    alpha_zero: float,
+    reset_delay: bool,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor]:
+    """Unrolls the Funky recurrence over the leading time dimension.
+
+    `noise` holds the threshold jitter for every step, pre-sampled so the
+    loop does not launch an RNG kernel per step. Returns the membrane trace,
+    the pre-reset distance to threshold that each spike is fired from, the
+    final membrane potential and the final threshold."""
+    mem_rec = torch.empty_like(input_)
+    mem_shift = torch.empty_like(input_)
+    # state-precision copy; jitter accumulates on the full-precision master
+    thr = threshold.to(mem.dtype)
+
+    for step in range(input_.size(0)):
+        reset = (mem > thr).to(mem.dtype)
+        mem = (
+            beta * (mem - alpha_zero * reset * mem)
+            + input_[step]
+            - alpha_sub * reset * thr
+        )
+
+        shift = mem - thr
+        spk = (shift > 0).to(mem.dtype)
+
+        if not reset_delay:
+            do_reset = spk - reset  # avoid double reset
+            mem = mem - do_reset * (alpha_sub * thr + alpha_zero * mem)
+
+        mem_rec[step] = mem
+        mem_shift[step] = shift
+
+        if noise is not None:
+            occurred = spk.any().to(threshold.dtype)
+            threshold = threshold + occurred * noise[step]
+            thr = threshold.to(mem.dtype)
+
+    return mem_rec, mem_shift, mem, threshold
 
 
 class Funky(LIF):
@@ -143,6 +274,14 @@ class Funky(LIF):
 
     """
 
+    _funky_instances = weakref.WeakSet()
+    """Funky neurons only, so that :class:`Funky.detach_hidden` and
+    :class:`Funky.reset_hidden` need not scan every
+    :mod:`snntorch.SpikingNeuron` instance. Held weakly, so that discarded
+    layers (and the graphs their states hold on to) can be collected; Funky
+    neurons are therefore not kept in
+    :mod:`snntorch.SpikingNeuron.instances`."""
+
     def __init__(
         self,
         beta,
@@ -177,45 +316,349 @@ class Funky(LIF):
             learn_graded_spikes_factor,
         )
 
+        # tracked weakly in Funky._funky_instances instead of the base list
+        Funky._funky_instances.add(self)
+        instances = SpikingNeuron.instances
+        if instances and instances[-1] is self:
+            instances.pop()
+
         self._init_mem()
 
-        if self.reset_mechanism_val == 0:  # reset by subtraction
-            self.state_function = self._base_sub
-        elif self.reset_mechanism_val == 1:  # reset to zero
-            self.state_function = self._base_zero
-        elif self.reset_mechanism_val == 2:  # no reset, pure integration
-            self.state_function = self._base_int
+        self._bind_reset_mode()
+        self._bind_graded_spikes()
+        (
+            self._update,
+            self._update_reset,
+            self._update_no_delay,
+        ) = _funky_kernels_jit
+        # registered unbound, as a bound method would tie the module into a
+        # reference cycle that only the garbage collector can break
+        self.register_load_state_dict_post_hook(Funky._rebind_after_load)
 
         self.reset_delay = reset_delay
         self.funkiness = funkiness
 
+        # the Triton kernel has the default ATan surrogate baked in
+        self._default_spike_grad = (
+            self.spike_grad
+            if spike_grad is None and not surrogate_disable
+            else None
+        )
+
+        self._beta_src = None
+        self._beta_version = -1
+        self._beta_eff = None
+        self._threshold_src = None
+        self._threshold_version = -1
+        self._threshold_eff = None
+        self._state_dtype = None
+        self._cuda_graphs = None
+
+    def _bind_reset_mode(self):
+        self._reset_mode = int(self.reset_mechanism_val)
+        self._alpha_sub, self._alpha_zero = _reset_alphas[self._reset_mode]
+
+    def _bind_graded_spikes(self):
+        # with a fixed unit factor, scaling spikes is an identity op
+        factor = self.graded_spikes_factor
+        self._graded_identity = (
+            not factor.requires_grad
+            and factor.numel() == 1
+            and factor.item() == 1.0
+        )
+        self._graded_src = factor
+        self._graded_version = factor._version
+
+    def _graded_spikes_identity(self):
+        """Returns True if spikes need no scaling by graded_spikes_factor.
+        Only re-evaluated once the factor is replaced or modified
+        in-place."""
+        factor = self.graded_spikes_factor
+        if (
+            factor is not self._graded_src
+            or factor._version != self._graded_version
+        ):
+            self._bind_graded_spikes()
+        return self._graded_identity
+
+    def _bind_step_kernel(self):
+        # forward-only kernel for the configured reset timing
+        if self._reset_delay:
+            self._update_step = self._update
+        else:
+            self._update_step = self._update_no_delay
+
+    def _rebind_after_load(self, incompatible_keys):
+        self._bind_reset_mode()
+        self._bind_graded_spikes()
+
+    @property
+    def reset_mechanism(self):
+        """If reset_mechanism is modified, reset_mechanism_val is triggered
+        to update along with the reset weights of the step kernel.
+        0: subtract, 1: zero, 2: none."""
+        return self._reset_mechanism
+
+    @reset_mechanism.setter
+    def reset_mechanism(self, new_reset_mechanism):
+        LIF.reset_mechanism.fset(self, new_reset_mechanism)
+        self._bind_reset_mode()
+
+    @property
+    def reset_delay(self):
+        """If reset_delay is modified, the forward-only step kernel is
+        rebound to match."""
+        return self._reset_delay
+
+    @reset_delay.setter
+    def reset_delay(self, new_reset_delay):
+        self._reset_delay = new_reset_delay
+        self._bind_step_kernel()
+
     def _init_mem(self):
         mem = torch.zeros(0)
         self.register_buffer("mem", mem, False)
+        self._state_ready = False
+        self._mem_shared = False
+
+    def _ensure_state(self, input_):
+        """Zero-initializes :math:`mem` if it does not match the shape of
+        `input_`, reusing its storage where the state is not shared. Runs on
+        the first step after :math:`mem` is passed in or reset, and whenever
+        the shape of `input_` changes."""
+        if not self.mem.shape == input_.shape:
+            if (
+                self._mem_shared
+                or self._cuda_graphs
+                or self.mem.requires_grad
+                or self.mem._base is not None
+                or self.mem.dtype != input_.dtype
+                or _inference_only(self.mem)
+            ):
+                self.mem = torch.zeros_like(input_, device=self.mem.device)
+            else:
+                # reuse the state's own storage: resize_ only reallocates
+                # when growing past its capacity, e.g. on a smaller last batch
+                self.mem.resize_(input_.shape).zero_()
+        elif self.mem.dtype != input_.dtype and self._state_dtype is not None:
+            self.mem = self.mem.to(self._state_dtype)
+        self._materialize_params()
+        self._state_ready = True
+
+    def _zero_mem(self):
+        """Clears :math:`mem`. The buffer is zeroed in-place unless it has
+        been handed out to the caller, who may still hold a reference to it
+        (e.g., as the last entry of a recorded membrane trace), or was
+        created under :func:`torch.inference_mode`."""
+        if self._mem_shared or _inference_only(self.mem):
+            self.mem = torch.zeros_like(self.mem, device=self.mem.device)
+            self._mem_shared = False
+        elif self.mem.numel():
+            self.mem.detach_().zero_()
+        self._state_ready = False
 
     def reset_mem(self):
-        self.mem = torch.zeros_like(self.mem, device=self.mem.device)
+        self._zero_mem()
+        self._mem_shared = True
         return self.mem
 
     def init_funky(self):
         """Deprecated, use :class:`Funky.reset_mem` instead"""
         return self.reset_mem()
 
+    def _prepare_forward(self, input_, mem, sequence=False):
+        """Shared preamble of :class:`Funky.forward` and
+        :class:`Funky.forward_sequence`: casts `input_` to the state dtype,
+        takes over a passed-in :math:`mem` and makes sure the state matches
+        a single time step of `input_` (its first entry if `sequence` is
+        True). Returns the cast `input_`."""
+        if self._state_dtype is not None:
+            input_ = input_.to(self._state_dtype)
+
+        if mem is not None:
+            if self.init_hidden:
+                raise TypeError(
+                    "`mem` should not be passed as an argument while "
+                    "`init_hidden=True`"
+                )
+            self.mem = mem
+            self._mem_shared = True
+            self._state_ready = False
+
+        step_shape = input_.shape[1:] if sequence else input_.shape
+        if not self._state_ready or self.mem.shape != step_shape:
+            self._ensure_state(input_[0] if sequence else input_)
+
+        # every state a forward leaves behind can be read back through
+        # `mem`, so none of them may be overwritten in-place later on
+        self._mem_shared = True
+
+        return input_
+
     def forward(self, input_, mem=None):
 
-        if not mem == None:
+        input_ = self._prepare_forward(input_, mem)
+
+        spk = self._funky_step(input_)
+
+        if self.output:
+            return spk, self.mem
+        elif self.init_hidden:
+            return spk
+        else:
+            return spk, self.mem
+
+    def forward_sequence(self, input_, mem=None):
+        """Runs the neuron over every time step of `input_` in a single
+        scripted loop, rather than one Python call per time step.
+
+        `input_` has shape `(num_steps, batch, input_size)`. Outputs are
+        stacked along the first dimension and follow the same `output` /
+        `init_hidden` convention as :class:`Funky.forward`; :math:`mem` is
+        left holding the state after the final step.
+
+        Falls back to stepping :class:`Funky.forward` internally when
+        `state_quant` or `inhibition` are used, or when `reset_delay=False`
+        and gradients are required."""
+
+        input_ = self._prepare_forward(input_, mem, sequence=True)
+
+        needs_grad = self._surrogate_needed(input_, self.mem, self.beta)
+
+        if (
+            self.state_quant
+            or self.inhibition
+            or (not self.reset_delay and needs_grad)
+        ):
+            spk_rec = []
+            mem_rec = []
+            for step in range(input_.size(0)):
+                spk_rec.append(self._funky_step(input_[step]))
+                mem_rec.append(self.mem)
+            spk_rec = torch.stack(spk_rec)
+            mem_rec = torch.stack(mem_rec)
+        else:
+            noise = None
+            if self.funkiness:
+                noise = (
+                    torch.randn(
+                        (input_.size(0),) + tuple(self.threshold.shape),
+                        dtype=self.threshold.dtype,
+                        device=self.threshold.device,
+                    )
+                    * self.funkiness
+                )
+
+            mem_rec, mem_shift, mem, threshold = _funky_rollout(
+                input_,
+                self.mem,
+                self._clamped_beta(self.mem.dtype),
+                self.threshold,
+                noise,
+                self._alpha_sub,
+                self._alpha_zero,
+                self.reset_delay,
+            )
+            if needs_grad:
+                spk_rec = self.spike_grad(mem_shift)
+            else:
+                spk_rec = (mem_shift > 0).to(mem_rec.dtype)
+            if not self._graded_spikes_identity():
+                spk_rec = spk_rec * self.graded_spikes_factor
+
             self.mem = mem
+            if noise is not None:
+                with torch.no_grad():
+                    self.threshold.copy_(threshold)
 
-        if self.init_hidden and not mem == None:
-            raise TypeError(
-                "`mem` should not be passed as an argument while `init_hidden=True`"
+        if self.output:
+            return spk_rec, mem_rec
+        elif self.init_hidden:
+            return spk_rec
+        else:
+            return spk_rec, mem_rec
+
+    def _funky_step(self, input_):
+        """Advances :math:`mem` by one time step and returns the spikes."""
+        if (
+            self._cuda_graphs is not None
+            and input_.is_cuda
+            and not (self.state_quant or self.inhibition)
+            and not self._surrogate_needed(
+                input_, self.mem, self.beta, self.graded_spikes_factor
+            )
+            and (not self.funkiness or self.threshold.dtype == self.mem.dtype)
+        ):
+            return self._graph_step(input_)
+        return self._eager_step(input_)
+
+    def _eager_step(self, input_):
+        threshold = self._cast_threshold(self.mem.dtype)
+        beta = self._clamped_beta(self.mem.dtype)
+
+        if not (
+            self.state_quant
+            or self.inhibition
+            or self._surrogate_needed(input_, self.mem, beta)
+        ):
+            # forward-only: the kernel produces the spikes and applies any
+            # same-step reset itself
+            spk, self.mem = self._update_step(
+                self.mem,
+                input_,
+                beta,
+                threshold,
+                self._alpha_sub,
+                self._alpha_zero,
             )
+            if not self._graded_spikes_identity():
+                spk = spk * self.graded_spikes_factor
+            self._funky_threshold(spk)
+            return spk
 
-        if not self.mem.shape == input_.shape:
-            self.mem = torch.zeros_like(input_, device=self.mem.device)
+        if self.funkiness and threshold is self.threshold:
+            # the kernels below may keep the threshold for their backward,
+            # while the jitter shifts the buffer in-place after the step
+            threshold = threshold.clone()
+
+        if (
+            self.reset_delay
+            and self.spike_grad is self._default_spike_grad
+            and not (self.state_quant or self.inhibition)
+            and _funky_kernel.supported(self.mem, input_, beta, threshold)
+        ):
+            # one Triton launch with the ATan backward written out by hand
+            spk, self.mem = _funky_kernel.funky_step_atan(
+                self.mem,
+                input_,
+                beta,
+                threshold,
+                self._alpha_sub,
+                self._alpha_zero,
+            )
+            if not self._graded_spikes_identity():
+                spk = spk * self.graded_spikes_factor
+            self._funky_threshold(spk)
+            return spk
 
-        self.reset = self.mem_reset(self.mem)
-        self.mem = self.state_function(input_)
+        if self.reset_delay:
+            _, self.mem = self._update(
+                self.mem,
+                input_,
+                beta,
+                threshold,
+                self._alpha_sub,
+                self._alpha_zero,
+            )
+        else:
+            _, self.mem, reset = self._update_reset(
+                self.mem,
+                input_,
+                beta,
+                threshold,
+                self._alpha_sub,
+                self._alpha_zero,
+            )
 
         if self.state_quant:
             self.mem = self.state_quant(self.mem)
@@ -225,59 +668,277 @@ class Funky(LIF):
                 self.mem.size(0), self.mem
             )  # batch_size
         else:
-            threshold_before_spike = self.threshold
-            spk = self.fire(self.mem)
+            spk = self._spike(self.mem)
 
         if not self.reset_delay:
-            do_reset = (
-                spk / self.graded_spikes_factor - self.reset
-            )  # avoid double reset
-            if self.reset_mechanism_val == 0:  # reset by subtraction
-                self.mem = self.mem - do_reset * threshold_before_spike
-            elif self.reset_mechanism_val == 1:  # reset to zero
-                self.mem = self.mem - do_reset * self.mem
+            if self._graded_spikes_identity():
+                do_reset = spk - reset  # avoid double reset
+            else:
+                do_reset = (
+                    spk / self.graded_spikes_factor - reset
+                )  # avoid double reset
+            self.mem = self.mem - do_reset * (
+                self._alpha_sub * threshold + self._alpha_zero * self.mem
+            )
 
-        if self.output:
-            return spk, self.mem
-        elif self.init_hidden:
-            return spk
-        else:
-            return spk, self.mem
+        # shift the threshold only after the reset above has used it
+        if not self.inhibition:
+            self._funky_threshold(spk)
+
+        return spk
 
+    def _graph_params(self, dtype):
+        """Returns the beta, threshold and graded spikes factor tensors a
+        captured step reads. Learnable parameters are cast inside the graph
+        from their own storage, so the parameters themselves are
+        returned."""
+        beta = self.beta
+        if not beta.requires_grad:
+            beta = self._clamped_beta(dtype)
+        threshold = self.threshold
+        if not threshold.requires_grad:
+            threshold = self._cast_threshold(dtype)
+        return beta, threshold, self.graded_spikes_factor
+
+    def _graph_settings(self):
+        """Returns the settings baked into a captured step."""
+        return (
+            self._alpha_sub,
+            self._alpha_zero,
+            self._update_step,
+            self.funkiness,
+            self._graded_spikes_identity(),
+        )
+
+    def _graph_step(self, input_):
+        mem = self.mem
+        params = self._graph_params(mem.dtype)
+
+        key = (input_.shape, input_.dtype, input_.device)
+        record = self._cuda_graphs.get(key)
+        if (
+            record is None
+            or any(a is not b for a, b in zip(record[0], params))
+            or record[1] != self._graph_settings()
+        ):
+            record = self._capture_step(input_)
+            self._cuda_graphs[key] = record
+        _, _, graph, static_input, static_mem, spk = record
+
+        static_input.copy_(input_)
+        if mem is not static_mem:
+            static_mem.copy_(mem)
+        graph.replay()
+
+        # mem can be read back after the step, e.g. through `lif.mem`, so
+        # it must not alias the graph buffer
+        self.mem = static_mem.clone()
+        return spk.clone()
+
+    def _capture_step(self, input_):
+        """Captures :class:`Funky._eager_step` into a CUDA graph. Returns the
+        parameters and settings the graph was captured with, the graph, and
+        its static input, state and spike tensors."""
+        static_input = input_.clone()
+        static_mem = self.mem.clone()
+        if self.funkiness:
+            threshold_init = self.threshold.clone()
+
+        # warm up on a side stream so the scripted kernel is fully optimized
+        # before capture, as required by torch.cuda.graph
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for _ in range(3):
+                self.mem = static_mem
+                self._eager_step(static_input)
+        torch.cuda.current_stream().wait_stream(stream)
+        if self.funkiness:
+            # undo the jitter drawn during warm-up
+            with torch.no_grad():
+                self.threshold.copy_(threshold_init)
+
+        params = self._graph_params(static_mem.dtype)
+        settings = self._graph_settings()
+
+        graph = torch.cuda.CUDAGraph()
+        self.mem = static_mem
+        with torch.cuda.graph(graph):
+            spk = self._eager_step(static_input)
+            static_mem.copy_(self.mem)
+        self.mem = static_mem
+
+        return (
+            params,
+            settings,
+            graph,
+            static_input,
+            static_mem,
+            spk,
+        )
 
     # Override the parent fire method to fire in a funky silly way
     def fire(self, mem):
         """Generates spike if mem > threshold and updates threshold randomly after firing.
         Returns spk."""
 
-        if self.state_quant:
-            mem = self.state_quant(mem)
-
-        mem_shift = mem - self.threshold
-        spk = self.spike_grad(mem_shift)
-
-        spk = spk * self.graded_spikes_factor
-
-        # Update threshold randomly if spike !!
-        if torch.any(spk):
-            self.threshold += torch.normal(mean=0.0, std=self.funkiness, size=self.threshold.shape)
+        spk = self._spike(mem)
+        self._funky_threshold(spk)
 
         return spk
 
+    def _spike(self, mem):
+        if self.state_quant:
+            mem = self.state_quant(mem)
 
-    def _base_state_function(self, input_):
-        base_fn = self.beta.clamp(0, 1) * self.mem + input_
-        return base_fn
-
-    def _base_sub(self, input_):
-        return self._base_state_function(input_) - self.reset * self.threshold
-
-    def _base_zero(self, input_):
-        self.mem = (1 - self.reset) * self.mem
-        return self._base_state_function(input_)
+        threshold = self._cast_threshold(mem.dtype)
+        if self._surrogate_needed(mem):
+            mem_shift = mem - threshold
+            spk = self.spike_grad(mem_shift)
+        else:
+            # surrogates only shape the backward pass; their forward is a
+            # plain Heaviside, so a single comparison kernel is enough
+            spk = torch.gt(mem, threshold).to(mem.dtype)
 
-    def _base_int(self, input_):
-        return self._base_state_function(input_)
+        if self._graded_spikes_identity():
+            return spk
+        return spk * self.graded_spikes_factor
+
+    def _funky_threshold(self, spk):
+        """Randomly shifts the threshold if any neuron has spiked. The spike
+        check is kept on the device, so no host sync is forced per step."""
+        if not self.funkiness:
+            return
+        occurred = (spk.detach() != 0).any().to(self.threshold.dtype)
+        with torch.no_grad():
+            noise = torch.randn(
+                self.threshold.shape,
+                dtype=self.threshold.dtype,
+                device=self.threshold.device,
+            ).mul_(self.funkiness)
+            self.threshold.add_(occurred * noise)
+
+    def _clamped_beta(self, dtype):
+        """Returns beta clipped between 0 and 1 as a contiguous tensor in the
+        state's `dtype`. For a non-learnable beta the result is cached and
+        only recomputed once beta is replaced or modified in-place, or if
+        it was cached under :func:`torch.inference_mode`."""
+        beta = self.beta
+        if beta.requires_grad:
+            return beta.clamp(0, 1).to(dtype)
+        if (
+            beta is not self._beta_src
+            or beta._version != self._beta_version
+            or self._beta_eff.dtype != dtype
+            or _inference_only(self._beta_eff)
+        ):
+            self._beta_eff = beta.clamp(0, 1).to(dtype).contiguous()
+            self._beta_src = beta
+            self._beta_version = beta._version
+        return self._beta_eff
+
+    def _cast_threshold(self, dtype):
+        """Returns the threshold in the state's `dtype`. The threshold
+        buffer itself stays at full precision so the random jitter does not
+        accumulate rounding error; the cast copy is cached until the buffer
+        is replaced or updated in-place, or if it was cached under
+        :func:`torch.inference_mode`."""
+        threshold = self.threshold
+        if threshold.dtype == dtype:
+            return threshold
+        if threshold.requires_grad:
+            return threshold.to(dtype)
+        if (
+            threshold is not self._threshold_src
+            or threshold._version != self._threshold_version
+            or self._threshold_eff.dtype != dtype
+            or _inference_only(self._threshold_eff)
+        ):
+            self._threshold_eff = threshold.to(dtype)
+            self._threshold_src = threshold
+            self._threshold_version = threshold._version
+        return self._threshold_eff
+
+    def compile_step(self, **kwargs):
+        """Compiles the single-step kernel with :func:`torch.compile`.
+
+        Inductor generates one vectorized loop over the neurons (e.g.,
+        AVX2/AVX-512 on CPU), which suits large layers run one step at a
+        time. Keyword arguments are passed to :func:`torch.compile`;
+        `fullgraph=True` and `dynamic=False` are used unless overridden.
+        Avoid `mode="reduce-overhead"` on CUDA here, as its CUDA graphs
+        reuse output buffers that this neuron hands back as :math:`mem`;
+        use :class:`Funky.cuda_graph_step` instead.
+
+        Falls back to the scripted kernel if :func:`torch.compile` is not
+        available. Returns the module itself."""
+        if not hasattr(torch, "compile"):
+            warn(
+                "torch.compile is not available in this version of PyTorch, "
+                "the scripted step kernel will be used instead.",
+                UserWarning,
+            )
+            return self
+        kwargs.setdefault("fullgraph", True)
+        kwargs.setdefault("dynamic", False)
+        (
+            self._update,
+            self._update_reset,
+            self._update_no_delay,
+        ) = (torch.compile(fn, **kwargs) for fn in _funky_kernels)
+        self._bind_step_kernel()
+        return self
+
+    def cuda_graph_step(self, enable=True):
+        """Replays each single-step update from a captured CUDA graph.
+
+        For small layers a step is bound by kernel launch overhead: the
+        fused update, spike scaling, reset and threshold jitter are
+        replayed with a single launch instead. A graph is captured per
+        input shape and dtype on first use, and recaptured if beta,
+        threshold or the graded spikes factor are replaced, or if the reset
+        mechanism, `reset_delay`, `funkiness` or the step kernels change.
+
+        Only used for CUDA inputs when no gradient is required and neither
+        `state_quant` nor `inhibition` is set (nor a jittered threshold
+        kept at a different precision than :math:`mem`, see
+        :class:`Funky.half_inference`); other calls run eagerly.
+        Pass `enable=False` to release the graphs. Returns the module
+        itself."""
+        self._cuda_graphs = {} if enable else None
+        return self
+
+    def half_inference(self, dtype=torch.bfloat16):
+        """Runs the neuron in reduced precision for inference.
+
+        Inputs and :math:`mem` are cast to `dtype` (`torch.bfloat16` or
+        `torch.float16`), halving the memory traffic of every step. The
+        threshold buffer is kept at full precision as a master copy that
+        accumulates the random jitter, and the step kernels read a
+        low-precision copy of it. Returns the module itself."""
+        if dtype not in (torch.bfloat16, torch.float16):
+            raise ValueError(
+                "dtype must be set to either torch.bfloat16 or torch.float16."
+            )
+        self._state_dtype = dtype
+        self.mem = self.mem.to(dtype)
+        return self
+
+    def _materialize_params(self):
+        """Stores a per-neuron threshold buffer contiguously (e.g., if it
+        was passed in as an expanded view), so the step kernels read every
+        per-neuron operand with the same dense layout. Single-valued
+        thresholds stay 0-d: they broadcast for free inside the fused
+        kernel, and must keep drawing one shared jitter sample."""
+        threshold = self.threshold
+        if not threshold.requires_grad and not threshold.is_contiguous():
+            self.threshold = threshold.contiguous()
+
+    def _surrogate_needed(self, *tensors):
+        return torch.is_grad_enabled() and (
+            self.threshold.requires_grad
+            or any(tensor.requires_grad for tensor in tensors)
+        )
 
     @classmethod
     def detach_hidden(cls):
@@ -285,18 +946,13 @@ class Funky(LIF):
         Intended for use in truncated backpropagation through time where
         hidden state variables are instance variables."""
 
-        for layer in range(len(cls.instances)):
-            if isinstance(cls.instances[layer], Funky):
-                cls.instances[layer].mem.detach_()
+        for layer in cls._funky_instances:
+            layer.mem.detach_()
 
     @classmethod
     def reset_hidden(cls):
         """Used to clear hidden state variables to zero.
         Intended for use where hidden state variables are instance variables.
         Assumes hidden states have a batch dimension already."""
-        for layer in range(len(cls.instances)):
-            if isinstance(cls.instances[layer], Funky):
-                cls.instances[layer].mem = torch.zeros_like(
-                    cls.instances[layer].mem,
-                    device=cls.instances[layer].mem.device,
-                )
+        for layer in cls._funky_instances:
+            layer._zero_mem()
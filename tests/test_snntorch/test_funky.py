@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+
+"""Tests for Funky neuron."""
+
+import gc
+import weakref
+
+import pytest
+import snntorch as snn
+from snntorch import surrogate
+from snntorch._neurons import _funky_kernel
+import torch
+
+
+@pytest.fixture(scope="module")
+def input_():
+    return torch.Tensor([0.25, 0]).unsqueeze(-1)
+
+
+@pytest.fixture(scope="module")
+def input_seq():
+    torch.manual_seed(0)
+    return torch.rand(10, 4, 3) * 1.5
+
+
+@pytest.fixture(scope="module")
+def funky_instance():
+    return snn.Funky(beta=0.5)
+
+
+@pytest.fixture(scope="module")
+def funky_hidden_instance():
+    return snn.Funky(beta=0.5, init_hidden=True)
+
+
+class TestFunky:
+    def test_funky(self, funky_instance, input_):
+        mem = funky_instance.init_funky()
+
+        mem_rec = []
+        spk_rec = []
+
+        for i in range(2):
+
+            spk, mem = funky_instance(input_[i], mem)
+            mem_rec.append(mem)
+            spk_rec.append(spk)
+
+        assert mem_rec[1] == mem_rec[0] * 0.5 + input_[1]
+        assert spk_rec[0] == spk_rec[1]
+
+    def test_funky_reset(self):
+        lif = snn.Funky(beta=0.5)
+        lif.reset_mechanism = "zero"
+
+        assert lif.reset_mechanism_val == 1
+
+        # the spiking neuron is reset to zero on the following step
+        _, mem = lif(torch.tensor([1.5]), lif.init_funky())
+        _, mem = lif(torch.tensor([0.0]), mem)
+        assert mem == 0
+
+    def test_funky_reset_delay(self):
+        lif = snn.Funky(beta=0.5)
+        x = torch.tensor([1.5])
+
+        spk, mem = lif(x, lif.init_funky())
+        assert spk == 1
+        assert mem == 1.5
+
+        # switching a live neuron applies the reset within the same step
+        lif.reset_delay = False
+        spk, mem = lif(x, lif.init_funky())
+        assert spk == 1
+        assert mem == 0.5
+
+    def test_funky_init_hidden(self, funky_hidden_instance, input_):
+
+        spk_rec = []
+
+        for i in range(2):
+            spk = funky_hidden_instance(input_[i])
+            spk_rec.append(spk)
+
+        assert spk_rec[0] == spk_rec[1]
+
+    def test_funky_init_hidden_batch_size(self, input_seq):
+        lif = snn.Funky(beta=0.8, init_hidden=True)
+        lif(input_seq[0])
+
+        spk = lif(input_seq[1, :1])
+
+        assert spk.shape == input_seq[1, :1].shape
+        assert lif.mem.shape == input_seq[1, :1].shape
+
+    def test_funky_init_hidden_resize(self, input_seq):
+        lif = snn.Funky(beta=0.8, init_hidden=True)
+        lif(input_seq[0])
+
+        # cleared states are resized in place for the new batch size
+        for batch_size in [2, 4]:
+            lif.reset_hidden()
+            lif_ref = snn.Funky(beta=0.8, init_hidden=True)
+            for step in range(3):
+                x = input_seq[step, :batch_size]
+                assert torch.equal(lif(x), lif_ref(x))
+                assert torch.equal(lif.mem, lif_ref.mem)
+
+        with torch.inference_mode():
+            lif.reset_hidden()
+        spk = lif(input_seq[0, :1])
+
+        assert spk.shape == input_seq[0, :1].shape
+
+    def test_funky_cases(self, funky_hidden_instance, input_):
+        with pytest.raises(TypeError):
+            funky_hidden_instance(input_, input_)
+
+    @pytest.mark.parametrize("reset_mechanism", ["subtract", "zero", "none"])
+    @pytest.mark.parametrize("reset_delay", [True, False])
+    def test_funky_forward_sequence(
+        self, input_seq, reset_mechanism, reset_delay
+    ):
+        lif = snn.Funky(
+            beta=0.8, reset_mechanism=reset_mechanism, reset_delay=reset_delay
+        )
+
+        mem = lif.init_funky()
+        spk_rec = []
+        mem_rec = []
+        for step in range(input_seq.size(0)):
+            spk, mem = lif(input_seq[step], mem)
+            spk_rec.append(spk)
+            mem_rec.append(mem)
+
+        mem = lif.init_funky()
+        spk_seq, mem_seq = lif.forward_sequence(input_seq, mem)
+
+        assert torch.equal(spk_seq, torch.stack(spk_rec))
+        assert torch.allclose(mem_seq, torch.stack(mem_rec))
+
+    @pytest.mark.parametrize("reset_mechanism", ["subtract", "zero", "none"])
+    @pytest.mark.parametrize("reset_delay", [True, False])
+    @pytest.mark.parametrize("requires_grad", [True, False])
+    def test_funky_compile_step(
+        self, input_seq, reset_mechanism, reset_delay, requires_grad
+    ):
+        input_seq = input_seq.clone().requires_grad_(requires_grad)
+        lif = snn.Funky(
+            beta=0.8, reset_mechanism=reset_mechanism, reset_delay=reset_delay
+        )
+        lif_compiled = snn.Funky(
+            beta=0.8, reset_mechanism=reset_mechanism, reset_delay=reset_delay
+        ).compile_step()
+
+        mem = lif.init_funky()
+        mem_compiled = lif_compiled.init_funky()
+        for step in range(input_seq.size(0)):
+            spk, mem = lif(input_seq[step], mem)
+            spk_compiled, mem_compiled = lif_compiled(
+                input_seq[step], mem_compiled
+            )
+
+            assert torch.equal(spk, spk_compiled)
+            assert torch.allclose(mem, mem_compiled)
+
+    def test_funky_forward_sequence_grad(self, input_seq):
+        lif = snn.Funky(beta=0.8)
+        input_seq = input_seq.clone().requires_grad_()
+
+        spk_seq, _ = lif.forward_sequence(input_seq)
+        spk_seq.sum().backward()
+
+        assert input_seq.grad is not None
+        assert input_seq.grad.abs().sum() > 0
+
+    def test_funky_inference_mode(self, input_seq):
+        lif = snn.Funky(beta=0.8)
+        with torch.inference_mode():
+            lif(input_seq[0])
+
+        x = input_seq.clone().requires_grad_()
+        mem = lif.init_funky()
+        for step in range(x.size(0)):
+            spk, mem = lif(x[step], mem)
+        (spk.sum() + mem.sum()).backward()
+
+        assert x.grad is not None
+
+    def test_funky_graded_spikes(self, input_seq):
+        lif = snn.Funky(beta=0.8, graded_spikes_factor=2.0)
+        spk_seq, _ = lif.forward_sequence(input_seq)
+
+        assert set(spk_seq.unique().tolist()) <= {0.0, 2.0}
+
+        lif_unit = snn.Funky(beta=0.8)
+        spk_unit, _ = lif_unit.forward_sequence(input_seq)
+        assert torch.equal(spk_unit * 2.0, spk_seq)
+
+        lif_unit.load_state_dict(lif.state_dict())
+        spk_unit, _ = lif_unit.forward_sequence(
+            input_seq, lif_unit.init_funky()
+        )
+        assert torch.equal(spk_unit, spk_seq)
+
+        lif_unit = snn.Funky(beta=0.8, reset_delay=False)
+        lif_unit(input_seq[0])
+        lif_unit.graded_spikes_factor.fill_(2.0)
+        spk, _ = lif_unit(input_seq[1])
+        assert set(spk.unique().tolist()) <= {0.0, 2.0}
+
+        lif_unit.graded_spikes_factor = torch.tensor(3.0)
+        spk, _ = lif_unit(input_seq[2])
+        assert set(spk.unique().tolist()) <= {0.0, 3.0}
+
+    def test_funky_half_inference(self, input_seq):
+        lif = snn.Funky(beta=0.8, threshold=torch.ones(3))
+        lif_half = snn.Funky(
+            beta=0.8, threshold=torch.ones(3)
+        ).half_inference()
+
+        with torch.no_grad():
+            spk, mem = lif(input_seq[0])
+            spk_half, mem_half = lif_half(input_seq[0])
+            _, mem_seq_half = lif_half.forward_sequence(
+                input_seq, lif_half.init_funky()
+            )
+
+        assert mem_half.dtype == torch.bfloat16
+        assert mem_seq_half.dtype == torch.bfloat16
+        assert torch.allclose(mem_half.float(), mem, atol=1e-2)
+        # spikes may only differ where rounding crosses the threshold
+        margin = (mem - 1).abs() > 1e-2
+        assert torch.equal(spk_half.float()[margin], spk[margin])
+
+    def test_funky_half_inference_jitter(self):
+        lif = snn.Funky(
+            beta=0.8, funkiness=0.1, threshold=torch.ones(3)
+        ).half_inference()
+
+        with torch.no_grad():
+            lif(torch.full((2, 3), 2.0))
+
+        assert lif.threshold.dtype == torch.float32
+        assert not torch.equal(lif.threshold, torch.ones(3))
+
+    def test_funky_half_inference_mode(self, input_seq):
+        lif = snn.Funky(beta=0.8, threshold=torch.ones(3)).half_inference()
+        with torch.inference_mode():
+            lif(input_seq[0])
+
+        x = input_seq.clone().requires_grad_()
+        mem = lif.init_funky()
+        for step in range(x.size(0)):
+            spk, mem = lif(x[step], mem)
+        (spk.sum() + mem.sum()).float().backward()
+
+        assert x.grad is not None
+
+    @pytest.mark.parametrize("requires_grad", [True, False])
+    def test_funky_threshold_jitter(self, requires_grad):
+        lif = snn.Funky(beta=0.5, funkiness=0.1, threshold=torch.ones(3))
+        mem = lif.init_funky()
+
+        x = torch.zeros(2, 3, requires_grad=requires_grad)
+        spk, mem = lif(x, mem)
+        assert not spk.any()
+        assert torch.equal(lif.threshold, torch.ones(3))
+
+        x = torch.full((2, 3), 2.0, requires_grad=requires_grad)
+        spk, mem = lif(x, mem)
+        assert spk.any()
+        assert not torch.equal(lif.threshold, torch.ones(3))
+
+    def test_funky_forward_sequence_jitter(self):
+        lif = snn.Funky(beta=0.5, funkiness=0.1, threshold=torch.ones(3))
+
+        spk_seq, _ = lif.forward_sequence(torch.zeros(5, 2, 3))
+        assert not spk_seq.any()
+        assert torch.equal(lif.threshold, torch.ones(3))
+
+        spk_seq, _ = lif.forward_sequence(
+            torch.full((5, 2, 3), 2.0), lif.init_funky()
+        )
+        assert spk_seq.any()
+        assert not torch.equal(lif.threshold, torch.ones(3))
+
+    def test_funky_jitter_scale(self):
+        lif = snn.Funky(beta=0.5, funkiness=0.1, threshold=torch.ones(3))
+
+        torch.manual_seed(0)
+        lif(torch.full((2, 3), 2.0))
+        torch.manual_seed(0)
+        expected = torch.ones(3) + torch.randn(3) * 0.1
+
+        assert torch.allclose(lif.threshold, expected)
+
+    @pytest.mark.skipif(
+        not torch.cuda.is_available(), reason="requires CUDA"
+    )
+    @pytest.mark.parametrize("init_hidden", [True, False])
+    def test_funky_cuda_graph_step(self, input_seq, init_hidden):
+        input_seq = input_seq.cuda()
+        lif = snn.Funky(beta=0.8, init_hidden=init_hidden).cuda()
+        lif_graph = (
+            snn.Funky(beta=0.8, init_hidden=init_hidden)
+            .cuda()
+            .cuda_graph_step()
+        )
+
+        def step(layer, x, mem):
+            if init_hidden:
+                return layer(x), layer.mem
+            return layer(x, mem)
+
+        mem = lif.init_funky()
+        mem_graph = lif_graph.init_funky()
+        mem_rec = []
+        mem_graph_rec = []
+        with torch.no_grad():
+            for i in range(input_seq.size(0)):
+                if i == input_seq.size(0) // 2:
+                    lif.reset_mechanism = "zero"
+                    lif_graph.reset_mechanism = "zero"
+
+                spk, mem = step(lif, input_seq[i], mem)
+                spk_graph, mem_graph = step(lif_graph, input_seq[i], mem_graph)
+                mem_rec.append(mem)
+                mem_graph_rec.append(mem_graph)
+
+                assert torch.equal(spk, spk_graph)
+
+        # recorded states must not alias the graph's static buffer
+        assert torch.allclose(torch.stack(mem_rec), torch.stack(mem_graph_rec))
+
+    @pytest.mark.skipif(
+        not torch.cuda.is_available(), reason="requires CUDA"
+    )
+    def test_funky_cuda_graph_step_learnable_factor(self, input_seq):
+        x = input_seq[0].cuda()
+        lif = snn.Funky(beta=0.8, learn_graded_spikes_factor=True).cuda()
+        lif_graph = (
+            snn.Funky(beta=0.8, learn_graded_spikes_factor=True)
+            .cuda()
+            .cuda_graph_step()
+        )
+
+        for _ in range(2):
+            lif(x, lif.init_funky())[0].sum().backward()
+            lif_graph(x, lif_graph.init_funky())[0].sum().backward()
+
+        assert torch.allclose(
+            lif.graded_spikes_factor.grad, lif_graph.graded_spikes_factor.grad
+        )
+
+    @pytest.mark.skipif(
+        not torch.cuda.is_available() or _funky_kernel.triton is None,
+        reason="requires CUDA and Triton",
+    )
+    @pytest.mark.parametrize("funkiness", [0.0, 0.1])
+    def test_funky_triton_step(self, input_seq, funkiness):
+        def run(spike_grad):
+            torch.manual_seed(0)
+            lif = snn.Funky(
+                beta=torch.full((3,), 0.8),
+                threshold=torch.ones(3),
+                funkiness=funkiness,
+                spike_grad=spike_grad,
+                learn_beta=True,
+                learn_threshold=True,
+            ).cuda()
+            x = input_seq.cuda().requires_grad_()
+
+            mem = lif.init_funky()
+            spk_rec = []
+            mem_rec = []
+            for step in range(x.size(0)):
+                spk, mem = lif(x[step], mem)
+                spk_rec.append(spk)
+                mem_rec.append(mem)
+            spk_rec = torch.stack(spk_rec)
+            mem_rec = torch.stack(mem_rec)
+            (spk_rec.sum() + mem_rec.sum()).backward()
+
+            return spk_rec, mem_rec, x.grad, lif.beta.grad, lif.threshold.grad
+
+        # the default surrogate runs on the Triton kernel, an explicitly
+        # passed one on the scripted kernels
+        for triton_out, scripted_out in zip(
+            run(None), run(surrogate.atan())
+        ):
+            assert torch.allclose(triton_out, scripted_out, atol=1e-5)
+
+    def test_funky_reset_mem(self, input_seq):
+        lif = snn.Funky(beta=0.8, init_hidden=True)
+        lif(input_seq[0])
+        mem = lif.mem
+        mem_before = mem.clone()
+        lif.reset_hidden()
+
+        assert torch.equal(mem, mem_before)
+        assert torch.all(lif.mem == 0)
+
+        # a state cleared under inference_mode is cleared again outside it
+        with torch.inference_mode():
+            lif(input_seq[0])
+            lif.reset_hidden()
+        lif.reset_hidden()
+
+        assert torch.all(lif.mem == 0)
+
+        lif = snn.Funky(beta=0.8)
+        _, mem = lif(input_seq[0])
+        mem_before = mem.clone()
+        lif.reset_mem()
+
+        assert torch.equal(mem, mem_before)
+        assert torch.all(lif.mem == 0)
+
+    def test_funky_instances_weakref(self):
+        lif = snn.Funky(beta=0.5)
+        assert lif in snn.Funky._funky_instances
+        assert not any(
+            layer is lif for layer in snn.SpikingNeuron.instances
+        )
+
+        lif_ref = weakref.ref(lif)
+        del lif
+        gc.collect()
+
+        assert lif_ref() is None